@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
+import time
+from collections import namedtuple
 from datetime import datetime, timedelta
 import os
 from pathlib import Path
@@ -16,9 +18,85 @@ st.set_page_config(
 # Database setup
 DB_PATH = "camp_tracker.db"
 
+# Hot-path SQL as stable module-level literals so SQLite's internal
+# prepared-statement cache hits on every call
+SQL_UPSERT_PERSON = '''
+    INSERT OR REPLACE INTO personnel (name, phone, supervisor, supervisor_phone, company, updated_at)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+'''
+
+SQL_INSERT_DEPARTURE = '''
+    INSERT INTO departures (person_name, destination, expected_return, phone, supervisor, company,
+                            departed_at_ts, expected_return_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+SQL_MARK_RETURNED = '''
+    UPDATE departures
+    SET actual_return = CURRENT_TIMESTAMP,
+        actual_return_ts = ?
+    WHERE id = ?
+'''
+
+# extensions_count already carries the per-departure history the app uses,
+# so no row is written to the extensions table on extension
+SQL_EXTEND_DEPARTURE = '''
+    UPDATE departures
+    SET expected_return_ts = expected_return_ts + ? * 3600,
+        expected_return = datetime(expected_return_ts + ? * 3600, 'unixepoch', 'localtime'),
+        extensions_count = extensions_count + 1
+    WHERE id = ?
+'''
+
+# Manifest CSV header normalization
+MANIFEST_COLUMN_MAPPING = {
+    'full name': 'name',
+    'fullname': 'name',
+    'employee name': 'name',
+    'mobile': 'phone',
+    'cell': 'phone',
+    'phone number': 'phone',
+    'manager': 'supervisor',
+    'supervisor name': 'supervisor',
+    'manager phone': 'supervisor_phone',
+    'supervisor phone': 'supervisor_phone',
+    'organization': 'company',
+    'employer': 'company'
+}
+
+MANIFEST_COLUMNS = ['name', 'phone', 'supervisor', 'supervisor_phone', 'company']
+
+# Static page CSS; st.markdown has to re-emit it every rerun for the
+# style element to stay in the page
+PAGE_CSS = """
+<style>
+    .stButton>button {
+        width: 100%;
+    }
+    .stTabs [data-baseweb="tab-list"] {
+        gap: 24px;
+    }
+    .stTabs [data-baseweb="tab"] {
+        padding-left: 20px;
+        padding-right: 20px;
+    }
+</style>
+"""
+
+@st.cache_resource
+def get_conn():
+    """Shared SQLite connection, created once per process"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
+
+@st.cache_resource
 def init_db():
-    """Initialize database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
+    """Initialize database with required tables (runs once per process)"""
+    conn = get_conn()
     c = conn.cursor()
     
     # Personnel manifest table
@@ -62,137 +140,227 @@ def init_db():
             FOREIGN KEY (departure_id) REFERENCES departures (id)
         )
     ''')
-    
-    conn.commit()
-    conn.close()
-
-def get_personnel():
-    """Get all personnel from manifest"""
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM personnel ORDER BY name", conn)
-    conn.close()
-    return df
-
-def add_personnel(name, phone=None, supervisor=None, supervisor_phone=None, company=None):
-    """Add or update a person in the manifest"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
+
+    # Migrate to integer Unix-epoch timestamp columns so comparisons and
+    # arithmetic are integer ops instead of string parsing; the legacy TEXT
+    # columns stay populated for backward compatibility
+    dep_cols = {row[1] for row in c.execute('PRAGMA table_info(departures)')}
+    for col in ('departed_at_ts', 'expected_return_ts', 'actual_return_ts'):
+        if col not in dep_cols:
+            c.execute(f'ALTER TABLE departures ADD COLUMN {col} INTEGER')
+    # departed_at/actual_return were written by CURRENT_TIMESTAMP (UTC),
+    # but expected_return came from the form as a naive local-time string,
+    # so it needs the 'utc' modifier to land on the right epoch second
     c.execute('''
-        INSERT OR REPLACE INTO personnel (name, phone, supervisor, supervisor_phone, company, updated_at)
-        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-    ''', (name, phone, supervisor, supervisor_phone, company))
-    
+        UPDATE departures
+        SET departed_at_ts = CAST(strftime('%s', departed_at) AS INTEGER),
+            expected_return_ts = CAST(strftime('%s', expected_return, 'utc') AS INTEGER),
+            actual_return_ts = CAST(strftime('%s', actual_return) AS INTEGER)
+        WHERE expected_return_ts IS NULL
+    ''')
+
+    # Indexes for the Statistics tab date-range aggregations
+    c.execute('DROP INDEX IF EXISTS idx_dep_departed_at')
+    c.execute('DROP INDEX IF EXISTS idx_dep_actual_return')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_dep_departed_ts ON departures(departed_at_ts)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_dep_return_ts ON departures(actual_return_ts)')
+
+    # Composite index so the active-departures query (actual_return IS NULL
+    # ORDER BY expected_return) is an index range scan, not scan + sort
+    c.execute('DROP INDEX IF EXISTS idx_dep_active')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_dep_active_ts ON departures(actual_return_ts, expected_return_ts)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ext_dep ON extensions(departure_id)')
+
     conn.commit()
-    conn.close()
 
-def get_active_departures():
-    """Get all active (not returned) departures"""
-    conn = sqlite3.connect(DB_PATH)
+def db_token():
+    """Cache token that changes whenever the database does.
+
+    The file mtime is useless here: in WAL mode commits land in the -wal
+    file and the main DB file is untouched until a checkpoint. PRAGMA
+    data_version bumps when another connection commits, and total_changes
+    covers writes made through the shared connection itself.
+    """
+    conn = get_conn()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    return (data_version, conn.total_changes)
+
+def _query_df(sql, params=()):
+    """Build a DataFrame straight from the DBAPI cursor, bypassing the
+    pandas SQL layer (slow for small result sets)"""
+    cur = get_conn().execute(sql, params)
+    cols = [c[0] for c in cur.description]
+    return pd.DataFrame(cur.fetchall(), columns=cols)
+
+@st.cache_data(show_spinner=False)
+def get_personnel(token):
+    """Get all personnel from manifest (cached until the database changes)"""
+    return _query_df("SELECT * FROM personnel ORDER BY name")
+
+@st.cache_data(show_spinner=False)
+def get_personnel_names(token):
+    """Names only, for the departure-form dropdown (cached until the database changes)"""
+    cur = get_conn().execute("SELECT name FROM personnel ORDER BY name")
+    return [row[0] for row in cur.fetchall()]
+
+Person = namedtuple('Person', ['phone', 'supervisor', 'company'])
+
+def get_person(name):
+    """Fetch one person's contact details from the manifest"""
+    row = get_conn().execute(
+        "SELECT phone, supervisor, company FROM personnel WHERE name = ?", (name,)
+    ).fetchone()
+    return Person(*row) if row else None
+
+@st.cache_data(show_spinner=False)
+def get_active_departures(token):
+    """Get all active (not returned) departures (cached until the database changes)"""
     query = '''
-        SELECT *, 
-               CASE 
-                   WHEN datetime(expected_return) < datetime('now') THEN 1 
-                   ELSE 0 
-               END as is_overdue
-        FROM departures 
-        WHERE actual_return IS NULL 
-        ORDER BY expected_return
+        SELECT * FROM departures
+        WHERE actual_return_ts IS NULL
+        ORDER BY expected_return_ts
     '''
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    return _query_df(query)
+
+@st.cache_data(show_spinner=False)
+def get_departure_stats(token, today_start):
+    """Aggregate departure statistics, computed inside SQLite"""
+    conn = get_conn()
+    total = conn.execute("SELECT COUNT(*) FROM departures").fetchone()[0]
+    today_returns = conn.execute(
+        "SELECT COUNT(*) FROM departures WHERE actual_return_ts >= ?", (today_start,)
+    ).fetchone()[0]
+    today_departures = conn.execute(
+        "SELECT COUNT(*) FROM departures WHERE departed_at_ts >= ?", (today_start,)
+    ).fetchone()[0]
+    avg_duration = conn.execute('''
+        SELECT AVG((actual_return_ts - departed_at_ts) / 3600.0)
+        FROM departures WHERE actual_return_ts IS NOT NULL
+    ''').fetchone()[0]
+    top_destinations = _query_df('''
+        SELECT destination, COUNT(*) AS trips
+        FROM departures
+        GROUP BY destination
+        ORDER BY trips DESC
+        LIMIT 10
+    ''').set_index('destination')['trips']
+    return total, today_returns, today_departures, avg_duration, top_destinations
 
 def add_departure(person_name, destination, expected_return, phone=None, supervisor=None, company=None):
     """Log a new departure"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('''
-        INSERT INTO departures (person_name, destination, expected_return, phone, supervisor, company)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (person_name, destination, expected_return, phone, supervisor, company))
-    
-    conn.commit()
-    conn.close()
+    conn = get_conn()
+    with conn:
+        conn.execute(SQL_INSERT_DEPARTURE,
+                     (person_name, destination, expected_return, phone, supervisor, company,
+                      int(time.time()), int(expected_return.timestamp())))
+    get_active_departures.clear()
+    get_departure_stats.clear()
 
-def mark_returned(departure_id):
-    """Mark a departure as returned"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('''
-        UPDATE departures 
-        SET actual_return = CURRENT_TIMESTAMP 
-        WHERE id = ?
-    ''', (departure_id,))
-    
-    conn.commit()
-    conn.close()
+def add_personnel_and_departure(name, destination, expected_return, phone=None, supervisor=None, company=None):
+    """Register a new person and log their departure in one transaction"""
+    conn = get_conn()
+    with conn:
+        conn.execute(SQL_UPSERT_PERSON, (name, phone, supervisor, None, company))
+        conn.execute(SQL_INSERT_DEPARTURE,
+                     (name, destination, expected_return, phone, supervisor, company,
+                      int(time.time()), int(expected_return.timestamp())))
+    get_personnel.clear()
+    get_personnel_names.clear()
+    get_active_departures.clear()
+    get_departure_stats.clear()
 
-def extend_departure(departure_id, hours):
-    """Extend a departure's expected return time"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Add extension record
-    c.execute('''
-        INSERT INTO extensions (departure_id, hours_extended)
-        VALUES (?, ?)
-    ''', (departure_id, hours))
-    
-    # Update expected return and extension count
-    c.execute('''
-        UPDATE departures 
-        SET expected_return = datetime(expected_return, '+' || ? || ' hours'),
-            extensions_count = extensions_count + 1
-        WHERE id = ?
-    ''', (hours, departure_id))
-    
-    conn.commit()
-    conn.close()
+def upload_manifest_stream(file_like, chunksize=5000):
+    """Stream a personnel manifest CSV into the database chunk by chunk"""
+    conn = get_conn()
+    uploaded = 0
 
-def upload_manifest(df):
-    """Upload personnel manifest from dataframe"""
-    conn = sqlite3.connect(DB_PATH)
-    
-    # Standardize column names
-    column_mapping = {
-        'full name': 'name',
-        'fullname': 'name',
-        'employee name': 'name',
-        'mobile': 'phone',
-        'cell': 'phone',
-        'phone number': 'phone',
-        'manager': 'supervisor',
-        'supervisor name': 'supervisor',
-        'manager phone': 'supervisor_phone',
-        'supervisor phone': 'supervisor_phone',
-        'organization': 'company',
-        'employer': 'company'
-    }
-    
-    # Rename columns based on mapping
-    df.columns = [column_mapping.get(col.lower(), col.lower()) for col in df.columns]
-    
-    # Ensure required columns exist
-    required_cols = ['name', 'phone', 'supervisor', 'supervisor_phone', 'company']
-    for col in required_cols:
-        if col not in df.columns:
-            df[col] = None
-    
-    # Upload to database (upsert)
-    for _, row in df.iterrows():
-        if pd.notna(row['name']):
-            add_personnel(
-                row['name'],
-                row.get('phone'),
-                row.get('supervisor'),
-                row.get('supervisor_phone'),
-                row.get('company')
-            )
-    
-    conn.close()
+    # Upload to database (upsert) in a single transaction, one chunk at a time
+    with conn:
+        for chunk in pd.read_csv(file_like, chunksize=chunksize):
+            # Rename columns based on mapping, then add missing required
+            # columns as NaN and drop unused ones in a single reindex
+            chunk = chunk.rename(columns=lambda c: MANIFEST_COLUMN_MAPPING.get(c.lower(), c.lower()))
+            chunk = chunk.reindex(columns=MANIFEST_COLUMNS)
+
+            # Box numpy scalars to Python objects (sqlite3 can't bind
+            # np.int64, which phone columns parse to) and NaN to None
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+
+            rows = list(chunk.loc[chunk['name'].notna()].itertuples(index=False, name=None))
+            conn.executemany(SQL_UPSERT_PERSON, rows)
+            uploaded += len(rows)
+
+    get_personnel.clear()
+    get_personnel_names.clear()
+    return uploaded
+
+@st.fragment
+def render_active_departures():
+    """Render the active departures as one editable table; action edits
+    re-run only this fragment"""
+    active_departures = get_active_departures(db_token())
+
+    if active_departures.empty:
+        st.success("✅ Everyone is in camp!")
+        return
+
+    # Build the display frame with vectorized ops; one widget regardless of N
+    hours_remaining = (active_departures['expected_return_ts'] - time.time()) / 3600
+    display = active_departures[['id', 'person_name', 'destination', 'company', 'extensions_count']].copy()
+    display['status'] = '🟢'
+    display.loc[hours_remaining < 0.5, 'status'] = '🟡'
+    display.loc[hours_remaining < 0, 'status'] = '🔴'
+    # One vectorized epoch conversion for the whole column, never per row
+    display['departed'] = pd.to_datetime(
+        active_departures['departed_at_ts'], unit='s'
+    ).dt.strftime('%I:%M %p')
+    display['hours_remaining'] = hours_remaining.round(1)
+    display['action'] = '—'
+
+    edited = st.data_editor(
+        display[['status', 'person_name', 'destination', 'company', 'departed',
+                 'hours_remaining', 'extensions_count', 'action']],
+        column_config={
+            'status': st.column_config.TextColumn('', width='small'),
+            'person_name': st.column_config.TextColumn('Name'),
+            'destination': st.column_config.TextColumn('Destination'),
+            'company': st.column_config.TextColumn('Company'),
+            'departed': st.column_config.TextColumn('Departed'),
+            'hours_remaining': st.column_config.NumberColumn('Hours Left', format='%.1f'),
+            'extensions_count': st.column_config.NumberColumn('Extensions'),
+            'action': st.column_config.SelectboxColumn(
+                'Action', options=['—', '+1h', '+2h', '+3h', 'Returned'], required=True
+            ),
+        },
+        disabled=['status', 'person_name', 'destination', 'company', 'departed',
+                  'hours_remaining', 'extensions_count'],
+        hide_index=True,
+        use_container_width=True,
+        key="active_editor"
+    )
+
+    # Apply all pending actions in one transaction
+    pending = edited.loc[edited['action'] != '—', 'action']
+    if not pending.empty:
+        returns = []
+        extends = []
+        for idx, action in pending.items():
+            dep_id = int(display.loc[idx, 'id'])
+            if action == 'Returned':
+                returns.append((int(time.time()), dep_id))
+            else:
+                hours = int(action[1])
+                extends.append((hours, hours, dep_id))
+
+        conn = get_conn()
+        with conn:
+            if returns:
+                conn.executemany(SQL_MARK_RETURNED, returns)
+            if extends:
+                conn.executemany(SQL_EXTEND_DEPARTURE, extends)
+        get_active_departures.clear()
+        get_departure_stats.clear()
+        st.rerun(scope="fragment")
 
 # Initialize database
 init_db()
@@ -203,17 +371,18 @@ page = st.sidebar.radio("Navigation", ["📝 Departure Form", "📊 Tracker & Ma
 if page == "📝 Departure Form":
     st.title("🏕️ Camp Departure Form")
     
-    # Get personnel list
-    personnel_df = get_personnel()
-    
+    # Only the names are needed to populate the dropdown; the selected
+    # person's details are fetched on submit
+    personnel_names = get_personnel_names(db_token())
+
     col1, col2 = st.columns([2, 1])
-    
+
     with col1:
         # Create form
         with st.form("departure_form", clear_on_submit=True):
             # Name selection
-            if not personnel_df.empty:
-                name_options = ["-- Add New Person --"] + personnel_df['name'].tolist()
+            if personnel_names:
+                name_options = ["-- Add New Person --"] + personnel_names
                 selected_name = st.selectbox("Name", name_options)
                 
                 if selected_name == "-- Add New Person --":
@@ -222,8 +391,6 @@ if page == "📝 Departure Form":
                     new_supervisor = st.text_input("Supervisor (optional)", key="new_supervisor")
                     new_company = st.text_input("Company (optional)", key="new_company")
                 else:
-                    # Get person's details from manifest
-                    person = personnel_df[personnel_df['name'] == selected_name].iloc[0]
                     new_name = None
             else:
                 st.info("No personnel in manifest. Add new person below.")
@@ -261,20 +428,20 @@ if page == "📝 Departure Form":
             if submitted:
                 if new_name:  # New person
                     if new_name.strip():
-                        add_personnel(new_name, new_phone, new_supervisor, None, new_company)
-                        add_departure(new_name, destination, expected_return, new_phone, new_supervisor, new_company)
+                        add_personnel_and_departure(new_name, destination, expected_return,
+                                                    new_phone, new_supervisor, new_company)
                         st.success(f"✅ {new_name} logged as departed to {destination}")
                     else:
                         st.error("Please enter a name")
                 elif selected_name and selected_name != "-- Add New Person --":  # Existing person
-                    person = personnel_df[personnel_df['name'] == selected_name].iloc[0]
+                    person = get_person(selected_name)
                     add_departure(
-                        selected_name, 
-                        destination, 
+                        selected_name,
+                        destination,
                         expected_return,
-                        person.get('phone'),
-                        person.get('supervisor'),
-                        person.get('company')
+                        person.phone,
+                        person.supervisor,
+                        person.company
                     )
                     st.success(f"✅ {selected_name} logged as departed to {destination}")
                 else:
@@ -283,13 +450,13 @@ if page == "📝 Departure Form":
     with col2:
         # Quick stats
         st.markdown("### 📊 Current Status")
-        active_departures = get_active_departures()
+        active_departures = get_active_departures(db_token())
         
         metric_col1, metric_col2 = st.columns(2)
         with metric_col1:
             st.metric("Currently Out", len(active_departures))
         with metric_col2:
-            overdue_count = len(active_departures[active_departures['is_overdue'] == 1])
+            overdue_count = int((active_departures['expected_return_ts'] < time.time()).sum())
             st.metric("Overdue", overdue_count, delta_color="inverse")
         
         if overdue_count > 0:
@@ -302,65 +469,7 @@ elif page == "📊 Tracker & Management":
     tab1, tab2, tab3 = st.tabs(["📍 Active Departures", "📋 Personnel Manifest", "📈 Statistics"])
     
     with tab1:
-        active_departures = get_active_departures()
-        
-        if active_departures.empty:
-            st.success("✅ Everyone is in camp!")
-        else:
-            # Display active departures
-            for _, dep in active_departures.iterrows():
-                # Calculate time remaining
-                expected_return = pd.to_datetime(dep['expected_return'])
-                time_remaining = expected_return - datetime.now()
-                hours_remaining = time_remaining.total_seconds() / 3600
-                
-                # Determine status
-                if dep['is_overdue']:
-                    status_color = "🔴"
-                    status_text = f"OVERDUE by {abs(int(hours_remaining))}h {abs(int((hours_remaining % 1) * 60))}m"
-                elif hours_remaining < 0.5:
-                    status_color = "🟡"
-                    status_text = f"{int(hours_remaining * 60)}m remaining"
-                else:
-                    status_color = "🟢"
-                    status_text = f"{int(hours_remaining)}h {int((hours_remaining % 1) * 60)}m remaining"
-                
-                # Create card
-                with st.container():
-                    col1, col2, col3 = st.columns([3, 2, 2])
-                    
-                    with col1:
-                        st.markdown(f"### {status_color} {dep['person_name']}")
-                        st.caption(f"📍 {dep['destination']} • 🏢 {dep['company'] or 'N/A'}")
-                        st.caption(f"🕐 Departed: {pd.to_datetime(dep['departed_at']).strftime('%I:%M %p')}")
-                        if dep['extensions_count'] > 0:
-                            st.caption(f"🔄 Extended {dep['extensions_count']} time(s)")
-                    
-                    with col2:
-                        st.markdown(f"**{status_text}**")
-                        
-                        # Quick extend buttons
-                        col_ext1, col_ext2, col_ext3 = st.columns(3)
-                        with col_ext1:
-                            if st.button("+1h", key=f"ext1_{dep['id']}"):
-                                extend_departure(dep['id'], 1)
-                                st.rerun()
-                        with col_ext2:
-                            if st.button("+2h", key=f"ext2_{dep['id']}"):
-                                extend_departure(dep['id'], 2)
-                                st.rerun()
-                        with col_ext3:
-                            if st.button("+3h", key=f"ext3_{dep['id']}"):
-                                extend_departure(dep['id'], 3)
-                                st.rerun()
-                    
-                    with col3:
-                        if st.button("✅ Mark Returned", key=f"return_{dep['id']}", type="primary"):
-                            mark_returned(dep['id'])
-                            st.success(f"{dep['person_name']} marked as returned")
-                            st.rerun()
-                    
-                    st.divider()
+        render_active_departures()
     
     with tab2:
         st.subheader("Personnel Manifest Upload")
@@ -374,20 +483,21 @@ elif page == "📊 Tracker & Management":
         
         if uploaded_file is not None:
             try:
-                df = pd.read_csv(uploaded_file)
+                preview_df = pd.read_csv(uploaded_file, nrows=20)
                 st.write("Preview of uploaded data:")
-                st.dataframe(df.head())
-                
+                st.dataframe(preview_df.head())
+
                 if st.button("Upload to Manifest", type="primary"):
-                    upload_manifest(df)
-                    st.success(f"✅ Uploaded {len(df)} records to manifest")
+                    uploaded_file.seek(0)
+                    uploaded = upload_manifest_stream(uploaded_file)
+                    st.success(f"✅ Uploaded {uploaded} records to manifest")
                     st.rerun()
             except Exception as e:
                 st.error(f"Error reading CSV: {str(e)}")
         
         # Display current manifest
         st.subheader("Current Personnel Manifest")
-        personnel_df = get_personnel()
+        personnel_df = get_personnel(db_token())
         
         if not personnel_df.empty:
             # Add search/filter
@@ -418,58 +528,32 @@ elif page == "📊 Tracker & Management":
     with tab3:
         st.subheader("Statistics")
         
-        # Get all departures
-        conn = sqlite3.connect(DB_PATH)
-        all_departures = pd.read_sql_query("SELECT * FROM departures", conn)
-        conn.close()
-        
-        if not all_departures.empty:
+        # Aggregate in SQLite instead of loading the full departures table
+        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        total, today_returns, total_departures_today, avg_duration, top_destinations = \
+            get_departure_stats(db_token(), int(today_start.timestamp()))
+
+        if total > 0:
             col1, col2, col3, col4 = st.columns(4)
-            
+
             with col1:
-                total_out = len(get_active_departures())
+                total_out = len(get_active_departures(db_token()))
                 st.metric("Currently Out", total_out)
-            
+
             with col2:
-                today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                today_returns = len(all_departures[
-                    (pd.to_datetime(all_departures['actual_return']) >= today_start) & 
-                    (all_departures['actual_return'].notna())
-                ])
                 st.metric("Returned Today", today_returns)
-            
+
             with col3:
-                total_departures_today = len(all_departures[
-                    pd.to_datetime(all_departures['departed_at']) >= today_start
-                ])
                 st.metric("Departures Today", total_departures_today)
-            
+
             with col4:
-                avg_duration = all_departures[all_departures['actual_return'].notna()].apply(
-                    lambda x: (pd.to_datetime(x['actual_return']) - pd.to_datetime(x['departed_at'])).total_seconds() / 3600,
-                    axis=1
-                ).mean()
-                st.metric("Avg Duration", f"{avg_duration:.1f}h" if pd.notna(avg_duration) else "N/A")
-            
+                st.metric("Avg Duration", f"{avg_duration:.1f}h" if avg_duration is not None else "N/A")
+
             # Most frequent destinations
             st.subheader("Top Destinations")
-            top_destinations = all_departures['destination'].value_counts().head(10)
             st.bar_chart(top_destinations)
         else:
             st.info("No departure data available yet.")
 
 # Custom CSS
-st.markdown("""
-<style>
-    .stButton>button {
-        width: 100%;
-    }
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 24px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        padding-left: 20px;
-        padding-right: 20px;
-    }
-</style>
-""", unsafe_allow_html=True)
\ No newline at end of file
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
\ No newline at end of file